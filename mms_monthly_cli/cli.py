@@ -17,13 +17,14 @@
 from pathlib import Path
 
 import typer
-from rich import print
 from typing_extensions import Annotated
 
 from .mms_monthly import (
     _validate_data_dir,
+    clear_disk_cache,
     get_and_unzip_table_csv,
     get_available_tables,
+    get_tables,
     get_years_and_months,
 )
 
@@ -37,11 +38,28 @@ app = typer.Typer(
 )
 
 
+@app.callback()
+def main(
+    refresh: Annotated[
+        bool,
+        typer.Option(
+            "--refresh",
+            help="Ignore available periods and tables cached on disk, and scrape "
+            + "NEMWeb again",
+        ),
+    ] = False,
+):
+    if refresh:
+        clear_disk_cache()
+
+
 @app.command()
 def available_periods():
     """
     Displays years and the months within them for which data is available
     """
+    from rich import print
+
     print(get_years_and_months())
 
 
@@ -59,6 +77,8 @@ def available_tables(
     """
     Displays available tables for a period (i.e. supplied month and year)
     """
+    from rich import print
+
     _validate_data_dir(year, month, data_dir)
     print(get_available_tables(year, month, data_dir))
 
@@ -88,3 +108,36 @@ def get_table(
     """
     _validate_data_dir(year, month, data_dir)
     get_and_unzip_table_csv(year, month, data_dir, table, cache)
+
+
+@app.command(name="get-tables", no_args_is_help=True)
+def get_multiple_tables(
+    year: int,
+    month: int,
+    tables: Annotated[
+        str,
+        typer.Argument(help="Comma-separated table names, e.g. `TABLE_A,TABLE_B`"),
+    ],
+    cache: Annotated[
+        Path,
+        typer.Argument(
+            help="Directory to save data to. If it does not exist, it will be created"
+        ),
+    ],
+    data_dir: Annotated[
+        str,
+        typer.Argument(
+            help=("NEMWeb data directory to look at. Default is `DATA`."),
+        ),
+    ] = "DATA",
+):
+    """
+    Download and unzip monthly data zip files to get multiple data table CSVs in
+    cache. Tables are downloaded concurrently.
+    To see available tables for a given period, use the `available_tables` command
+    """
+    table_list = [table.strip() for table in tables.split(",") if table.strip()]
+    if not table_list:
+        raise typer.BadParameter("No table names supplied", param_hint="TABLES")
+    _validate_data_dir(year, month, data_dir)
+    get_tables(year, month, data_dir, list(dict.fromkeys(table_list)), cache)
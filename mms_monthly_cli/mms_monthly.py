@@ -14,20 +14,43 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import json
 import logging
+import os
+import re
 import shutil
-from functools import cache
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, lru_cache, wraps
+from hashlib import sha256
 from pathlib import Path
-from re import match
-from time import sleep
-from typing import Dict, List, Union
-from zipfile import BadZipFile, ZipFile
+from time import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Pattern,
+    Set,
+    Tuple,
+    Union,
+)
 
 import requests
-from bs4 import BeautifulSoup
-from tqdm.auto import tqdm
+from platformdirs import user_cache_dir
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from user_agent import generate_user_agent
 
+# stream_unzip and tqdm are imported where they are used, so that commands that
+# do not download tables do not pay their import cost
+if TYPE_CHECKING:
+    from tqdm.auto import tqdm
+
 logger = logging.getLogger(__name__)
 
 # Data
@@ -37,9 +60,75 @@ MMSDM_ARCHIVE_URL = (
 )
 """Wholesale electricity data archive base URL"""
 
+# maximum number of concurrent requests issued when scraping many pages
+_MAX_CONCURRENT_REQUESTS = 10
+
+# maximum number of tables downloaded concurrently
+_MAX_CONCURRENT_DOWNLOADS = 5
+
+# timeout (in seconds) for connecting to and receiving data from NEMWeb
+_TIMEOUT = 30
+
+# size (in bytes) of chunks read from downloads
+_CHUNK_SIZE = 1 << 18
+
+# size (in bytes) of chunks inflated from zip files and written to unzipped files
+_UNZIP_CHUNK_SIZE = 1 << 20
+
+# size (in bytes) of the write buffer for unzipped files
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# directory used to persist scraped results and download metadata across sessions
+_CACHE_DIR = Path(user_cache_dir("mms_monthly_cli"))
+
+# time (in seconds) for which scraped results persisted to disk are valid
+_DISK_CACHE_TTL = 24 * 60 * 60
+
+# environment variable that, if set, points to a directory in which unzipped csvs
+# are persisted across sessions and from which they are copied to `cache`
+_CSV_STORE_ENV_VAR = "MMS_CACHE"
+
+# header for requests to pages linked from the archive base URL
+_ARCHIVE_REFERER_HEADER = {"Referer": MMSDM_ARCHIVE_URL}
+
+# header for zip downloads. Zip contents are already compressed, so the zip is
+# requested as is to avoid the server compressing it again and to ensure the
+# response stream can be unzipped directly
+_ZIP_DOWNLOAD_HEADER = {"Accept-Encoding": "identity"}
+
+# regular expressions used to parse scraped links and zip contents, compiled once.
+# NEMWeb directory listings precede each link with its last modified time and its
+# size in bytes (or `<dir>` for directories), so `_LINK_RE` captures both the
+# size (if listed) and the link. Sorting links (starting with "?") are skipped
+_LINK_RE = re.compile(rb'(?:([0-9]+)\s+)?<a\s+href="([^"?][^"]*)"', re.IGNORECASE)
+_TABLE_RE = re.compile(r"/PUBLIC_DVD_([A-Z_0-9]*)_[0-9]*\.zip")
+_MONTH_RE = re.compile(r"[0-9]{4}_([0-9]{2})")
+_YEAR_RE = re.compile(r"([0-9]{4})")
+_ZIP_NAME_RE = re.compile(r"DATA/(.*)\.zip")
+_CSV_RE = re.compile(r"(.*)\.[cC][sS][vV]")
+
 # requests session, to re-use TLS and HTTP connection across requests
 # for speed improvement
 _session = requests.Session()
+# all requests are to NEMWeb, so a single connection pool is sized to hold a
+# connection for each concurrent request. Connections are then kept alive and reused
+# across concurrent scraping rather than opened and discarded.
+# Requests that fail due to rate limiting or server errors are retried by urllib3
+# with exponential backoff. Once retries are exhausted, the last response is returned
+# so that `raise_for_status` raises a `requests.HTTPError`
+_session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=max(_MAX_CONCURRENT_REQUESTS, _MAX_CONCURRENT_DOWNLOADS),
+        max_retries=Retry(
+            total=5,
+            backoff_factor=0.2,
+            status_forcelist=(429, 500, 502, 503, 504),
+            raise_on_status=False,
+        ),
+    ),
+)
 _session.headers.update(
     {
         "User-Agent": generate_user_agent(),
@@ -52,7 +141,124 @@ _session.headers.update(
     }
 )
 
-# Functions to handle requests and scraped soup
+# Functions to persist results and download metadata across sessions
+
+
+def _disk_cache(
+    ttl: float, decode: Union[Callable[[Any], Any], None] = None
+) -> Callable[[Callable], Callable]:
+    """Caches JSON-serialisable function results on disk for `ttl` seconds
+
+    Results are keyed by function name and arguments and are stored in
+    `_CACHE_DIR`. Missing, expired or unreadable results are refreshed by calling
+    the decorated function.
+
+    Args:
+        ttl: Time (in seconds) for which a cached result is valid
+        decode: Function applied to a cached result once loaded from JSON, e.g. to
+            restore integer dictionary keys. Default is None (no decoding).
+    Returns:
+        Decorator
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = json.dumps([func.__name__, args, kwargs], sort_keys=True)
+            path = _CACHE_DIR / (sha256(key.encode()).hexdigest() + ".json")
+            try:
+                cached = json.loads(path.read_text())
+                if time() - cached["ts"] < ttl:
+                    value = cached["value"]
+                    return decode(value) if decode is not None else value
+            except (OSError, ValueError, KeyError):
+                pass
+            result = func(*args, **kwargs)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(json.dumps({"ts": time(), "value": result}))
+            except OSError:
+                logger.warning(f"Could not write {func.__name__} result to {path}")
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _get_validators_path(file_path: Path) -> Path:
+    """Path to cached HTTP validators (ETag and Last-Modified) for a download
+
+    Args:
+        file_path: Path of zip file within the directory it is unzipped to
+    Returns:
+        Path to JSON file in `_CACHE_DIR`
+    """
+    key = sha256(str(file_path.resolve()).encode()).hexdigest()
+    return _CACHE_DIR / "validators" / f"{key}.json"
+
+
+def _load_validators(file_path: Path) -> Dict[str, str]:
+    """Loads HTTP validators (ETag and Last-Modified) for a previous download
+
+    Args:
+        file_path: Path of zip file within the directory it is unzipped to
+    Returns:
+        Validators and the name of the unzipped csv (under "csv"), if the csv
+        unzipped alongside `file_path` still exists. Otherwise, an empty dict.
+    """
+    try:
+        validators: Dict[str, str] = json.loads(
+            _get_validators_path(file_path).read_text()
+        )
+    except (OSError, ValueError):
+        return {}
+    if not (csv := validators.get("csv")) or not (file_path.parent / csv).exists():
+        return {}
+    return validators
+
+
+def _get_conditional_header(validators: Dict[str, str]) -> Dict[str, str]:
+    """Conditional request header for a zip file that has previously been unzipped
+
+    Args:
+        validators: Validators loaded using `_load_validators`
+    Returns:
+        `If-None-Match` and/or `If-Modified-Since` header, if validators exist.
+        Otherwise, an empty dict.
+    """
+    header = {}
+    if etag := validators.get("etag"):
+        header["If-None-Match"] = etag
+    if last_modified := validators.get("last_modified"):
+        header["If-Modified-Since"] = last_modified
+    return header
+
+
+def _save_validators(file_path: Path, headers: Mapping, csv: str) -> None:
+    """Saves HTTP validators (ETag and Last-Modified) for a download
+
+    Args:
+        file_path: Path of zip file within the directory it is unzipped to
+        headers: Response headers from the download
+        csv: Name of the csv unzipped from the zip file
+    Returns:
+        None. Saves validators to `_CACHE_DIR`
+    """
+    validators = {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "csv": csv,
+    }
+    path = _get_validators_path(file_path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(validators))
+    except OSError:
+        logger.warning(f"Could not save download metadata to {path}")
+
+
+# Functions to handle requests and scraped links
 
 
 def _request_content(url: str, additional_header: Dict = {}) -> requests.Response:
@@ -63,67 +269,116 @@ def _request_content(url: str, additional_header: Dict = {}) -> requests.Respons
     Returns:
         requests Response object.
     """
-    r = _session.get(url, headers=additional_header)
+    r = _session.get(url, headers=additional_header, timeout=_TIMEOUT)
     return r
 
 
-def _rerequest_to_obtain_soup(url: str, additional_header: Dict = {}) -> BeautifulSoup:
-    """Continually launches requests until a 200 (OK) code is returned.
+def _request_links(
+    url: str, additional_header: Dict = {}
+) -> List[Tuple[str, Union[int, None]]]:
+    """Launches a GET request and scrapes links from the returned directory listing.
+
+    Requests that fail due to rate limiting or server errors are retried by
+    `_session`. Scraped links are memoized, so a page is only requested once per
+    session (see `clear_scrape_cache`).
 
     Args:
         url: URL for GET request.
 
     Returns:
-        BeautifulSoup object with parsed HTML.
+        All scraped links, each paired with the listed file size in bytes (None
+        if no size is listed, e.g. for directories)
 
+    Errors:
+        ValueError: If the page does not exist
+        requests.HTTPError: If the request is otherwise unsuccessful after any retries
     """
-    r = _request_content(url, additional_header)
-
-    # retry configuration
-    initial_wait = 0.1
-    max_wait = 10
-    backoff = 2
-    wait = initial_wait
-
-    while (ok := r.status_code == requests.status_codes.codes["OK"]) < 1:
-        r = _request_content(url, additional_header)
-        if r.status_code == requests.status_codes.codes["OK"]:
-            ok += 1
-        else:
-            logging.info("Relaunching request")
-            sleep(wait)
-            wait = min(wait * backoff, max_wait)
+    return _scrape_links(url, frozenset(additional_header.items()))
+
 
-    soup = BeautifulSoup(r.content, "html.parser")
-    return soup
+@lru_cache(maxsize=64)
+def _scrape_links(
+    url: str, additional_header_items: FrozenSet[Tuple[str, str]]
+) -> List[Tuple[str, Union[int, None]]]:
+    """Memoized implementation of `_request_links`
+
+    Args:
+        url: URL for GET request.
+        additional_header_items: Hashable items of additional request header.
+    Returns:
+        All scraped links, each paired with the listed file size in bytes (None
+        if no size is listed)
+    """
+    r = _request_content(url, dict(additional_header_items))
+    if r.status_code == requests.status_codes.codes["NOT_FOUND"]:
+        raise ValueError(f"{url} does not exist in the Monthly Data Archive")
+    r.raise_for_status()
+    links = [
+        (link.decode(), int(size) if size else None)
+        for size, link in _LINK_RE.findall(r.content)
+    ]
+    return links
+
+
+def clear_scrape_cache() -> None:
+    """Clears pages and table sizes scraped from NEMWeb during this session
+
+    Subsequent calls will request pages from NEMWeb again. Results cached on disk
+    are not affected (see `clear_disk_cache`).
+    """
+    _scrape_links.cache_clear()
+    get_table_names_and_sizes.cache_clear()
+
+
+def clear_disk_cache() -> None:
+    """Clears available periods and tables cached on disk
+
+    Subsequent calls to `get_years_and_months` and `get_available_tables` will
+    scrape NEMWeb again, e.g. to find data published since results were cached.
+    Metadata used to skip downloading unchanged tables is not affected.
+    """
+    for path in _CACHE_DIR.glob("*.json"):
+        path.unlink(missing_ok=True)
 
 
-def _get_all_links_from_soup(
+def _get_all_links(
     year: int, month: int, data_dir: Union[str, None]
-) -> List[str]:
+) -> List[Tuple[str, Union[int, None]]]:
     """Gets all links from scraped Data Archive year-month URL
     Args:
         year: Year
         month: Month
         data_dir : Directory within monthly archives, or None
     Returns:
-        All scraped links
+        All scraped links, each paired with the listed file size in bytes (None
+        if no size is listed, e.g. for directories)
+    Errors:
+        ValueError: If the Monthly Data Archive does not have data for the month and
+            year (or `data_dir` does not exist)
     """
-    available_years_and_months = get_years_and_months()
-    if (
-        year not in available_years_and_months.keys()
-        or month not in available_years_and_months[year]
-    ):
-        raise ValueError(f"Monthly Data Archive does not have data for {month}/{year}")
     url = _construct_yearmonth_url(year, month, data_dir)
-    soup = _rerequest_to_obtain_soup(url)
-    links = [link.get("href") for link in soup.find_all("a")]
+    links = _request_links(url)
     return links
 
 
+def _iter_with_progress(chunks: Iterable[bytes], bar: "tqdm") -> Iterator[bytes]:
+    """Yields chunks of a download, updating a progress bar as each is received
+
+    Args:
+        chunks: Chunks of a download.
+        bar: Progress bar with total set to the size of the download (in bytes).
+    Yields:
+        Chunks of the download.
+    """
+    for chunk in chunks:
+        bar.update(len(chunk))
+        yield chunk
+
+
 # Functions to construct filenames and URLs
 
 
+@cache
 def _construct_filename(year: int, month: int, table: str) -> str:
     """Constructs filename without file type
 
@@ -180,45 +435,131 @@ def _construct_table_url(year: int, month: int, data_dir: str, table: str) -> st
 # Functions to obtain table properties
 
 
-def _get_filesize(url: str) -> int:
-    """Gets size of zip file that URL points to (in bytes)
+def _get_table_names(
+    year: int, month: int, data_dir: str, regex: Pattern[str]
+) -> Set[str]:
+    """Returns table names from MMSDM Historical Data Archive page
+
+    For a year and month in the MMSDM Historical Data Archive, returns a set of
+    unique table names (obtained via captured regex group)
 
     Args:
-        url: URL of zip
+        year: Year
+        month: Month
+        data_dir : Directory within monthly archives
+        regex: Compiled regular expression, with one group capture
     Returns:
-        File size in bytes
+        Set of table names
     """
-    h = _session.head(url)
-    total_length = int(h.headers.get("Content-Length", 0))
-    return total_length
+    names: Set[str] = set()
+    links = _get_all_links(year, month, data_dir)
+    for link, _ in links:
+        if mo := regex.search(link):
+            name = mo.group(1).lstrip("_")
+            names.add(name)
+    return names
 
 
-def _get_table_names(year: int, month: int, data_dir: str, regex: str) -> List[str]:
-    """Returns table names from MMSDM Historical Data Archive page
+# Functions to download and unzip tables
+
 
-    For a year and month in the MMSDM Historical Data Archive, returns a list of
-    table names (obtained via captured regex group)
+def _download_and_unzip_csv(url: str, cache_path: Path) -> str:
+    """Downloads zip file from `url` and unzips its (single) csv to `cache_path`
 
     Args:
-        year: Year
-        month: Month
-        data_dir : Directory within monthly archives
-        regex: Regular expression pattern, with one group capture
+        url: URL of zip file
+        cache_path: Path to save csv.
     Returns:
-        List of table names
+        Name of csv in `cache_path` (including if it is unchanged since it was
+        previously unzipped).
+    Errors:
+        ValueError: If the zip file is invalid or corrupted, or its contents are
+            unexpected
     """
-    names = []
-    links = _get_all_links_from_soup(year, month, data_dir)
-    for link in links:
-        if mo := match(regex, link):
-            name = mo.group(1).lstrip("_")
-            names.append(name)
-    return list(set(names))
+    from stream_unzip import UnzipError, stream_unzip
+    from tqdm.auto import tqdm
+
+    file_name = url.rsplit("/", 1)[-1]
+    file_path = cache_path / file_name
+    validators = _load_validators(file_path)
+    header = {**_ZIP_DOWNLOAD_HEADER, **_get_conditional_header(validators)}
+    with _session.get(url, headers=header, stream=True, timeout=_TIMEOUT) as resp:
+        if resp.status_code == requests.status_codes.codes["NOT_MODIFIED"]:
+            logger.info(f"{file_name} unchanged since last download")
+            return validators["csv"]
+        # validators are only saved again once the csv is completely unzipped, so
+        # that an interrupted download is not later treated as unchanged
+        _get_validators_path(file_path).unlink(missing_ok=True)
+        total_length = int(resp.headers.get("Content-Length", 0))
+        resp.raise_for_status()
+        zfn = _ZIP_NAME_RE.search(url)
+        csvfn = None
+        # the csv is unzipped to a temporary file that only replaces any existing
+        # csv once it is complete
+        part_path = None
+        # redraws are limited to every 100 ms and every 0.1% of the download
+        with tqdm(
+            desc=file_name,
+            total=total_length,
+            unit="B",
+            unit_scale=True,
+            unit_divisor=1024,
+            mininterval=0.1,
+            miniters=max(total_length // 1000, 1),
+        ) as bar:
+            zipped_chunks = _iter_with_progress(
+                resp.iter_content(chunk_size=_CHUNK_SIZE), bar
+            )
+            try:
+                for member, _, unzipped_chunks in stream_unzip(
+                    zipped_chunks, chunk_size=_UNZIP_CHUNK_SIZE
+                ):
+                    if (
+                        csvfn is not None
+                        or not zfn
+                        or not (fn := _CSV_RE.match(member.decode()))
+                        or fn.group(1) != zfn.group(1)
+                    ):
+                        raise ValueError(f"Unexpected contents in zipfile from {url}")
+                    csvfn = member.decode()
+                    part_path = cache_path / f"{csvfn}.{os.getpid()}.part"
+                    with open(part_path, "wb", buffering=_WRITE_BUFFER_SIZE) as fout:
+                        for chunk in unzipped_chunks:
+                            fout.write(chunk)
+                if part_path is not None and csvfn is not None:
+                    os.replace(part_path, cache_path / csvfn)
+            except UnzipError as e:
+                raise ValueError(f"{file_name} invalid or corrupted") from e
+            finally:
+                if part_path is not None:
+                    part_path.unlink(missing_ok=True)
+        if csvfn is None:
+            raise ValueError(f"Unexpected contents in zipfile from {url}")
+        _save_validators(file_path, resp.headers, csvfn)
+    return csvfn
 
 
 # Validator functions
 
 
+def _validate_year_and_month(year: int, month: int) -> None:
+    """Validates user year and month specification
+
+    Args:
+        year: Year
+        month: Month
+    Errors:
+        ValueError: If the Monthly Data Archive does not have data for the month and
+            year
+    """
+    available_years_and_months = get_years_and_months()
+    if (
+        year not in available_years_and_months.keys()
+        or month not in available_years_and_months[year]
+    ):
+        raise ValueError(f"Monthly Data Archive does not have data for {month}/{year}")
+
+
 def _validate_data_dir(year: int, month: int, data_dir: str) -> None:
     """Validates user `data_dir` specification
 
@@ -229,19 +570,22 @@ def _validate_data_dir(year: int, month: int, data_dir: str) -> None:
     Errors:
         ValueError: If `data_dir` does not exist
     """
-    links = _get_all_links_from_soup(year, month, None)
-    links = [Path(link).name for link in links]
-    if data_dir not in links:
+    links = _get_all_links(year, month, None)
+    dirs = [Path(link).name for link, _ in links]
+    if data_dir not in dirs:
         raise ValueError(
             f"{data_dir} not in Monthly Data Archive for {year} {month}. "
-            + f"Possible dirs: {links}"
+            + f"Possible dirs: {dirs}"
         )
 
 
 # Main functions to find available data, or to obtain data
 
 
-@cache
+@_disk_cache(
+    ttl=_DISK_CACHE_TTL,
+    decode=lambda yearmonths: {int(year): m for year, m in yearmonths.items()},
+)
 def get_years_and_months() -> Dict[int, List[int]]:
     """Years and months with data on NEMWeb MMSDM Historical Data Archive
     Returns:
@@ -256,83 +600,94 @@ def get_years_and_months() -> Dict[int, List[int]]:
         Returns:
             List of unique months (as integers).
         """
-        referer_header = {"Referer": MMSDM_ARCHIVE_URL}
-        soup = _rerequest_to_obtain_soup(url, additional_header=referer_header)
-        months = []
-        for link in soup.find_all("a"):
-            url = link.get("href")
-            findmonth = match(r".*[0-9]{4}_([0-9]{2})", url)
+        links = _request_links(url, additional_header=_ARCHIVE_REFERER_HEADER)
+        months: Set[int] = set()
+        for link, _ in links:
+            findmonth = _MONTH_RE.search(link)
             if not findmonth:
                 continue
             else:
                 month = findmonth.group(1)
-                months.append(int(month))
-        unique = list(set(months))
-        return unique
-
-    soup = _rerequest_to_obtain_soup(MMSDM_ARCHIVE_URL)
-    links = soup.find_all("a")
-    yearmonths = {}
-    for link in links:
-        url = link.get("href")
-        findyear = match(r".*([0-9]{4}).*", url)
+                months.add(int(month))
+        return list(months)
+
+    links = _request_links(MMSDM_ARCHIVE_URL)
+    years = []
+    for link, _ in links:
+        findyear = _YEAR_RE.search(link)
         if not findyear:
             continue
         else:
-            year = int(findyear.group(1))
-            months = _get_months(MMSDM_ARCHIVE_URL + f"{year}/")
-            yearmonths[year] = months
+            years.append(int(findyear.group(1)))
+    # year listings are independent, so fetch them concurrently
+    year_urls = [MMSDM_ARCHIVE_URL + f"{year}/" for year in years]
+    with ThreadPoolExecutor(max_workers=_MAX_CONCURRENT_REQUESTS) as executor:
+        months = list(executor.map(_get_months, year_urls))
+    yearmonths = dict(zip(years, months))
     return yearmonths
 
 
-@cache
-def get_available_tables(year: int, month: int, data_dir: str) -> List[str]:
+@_disk_cache(ttl=_DISK_CACHE_TTL)
+def get_available_tables(
+    year: int, month: int, data_dir: str, validate: bool = False
+) -> List[str]:
     """Tables that can be requested from MMSDM Historical Data Archive for a
        particular month and year.
     Args:
         year: Year
         month: Month
         data_dir : Directory within monthly archives
+        validate: Whether to check that the year and month are listed in
+            `get_years_and_months` before scraping. This requires scraping every
+            year in the Monthly Data Archive. Default is False, in which case a
+            ValueError is still raised if the year and month do not exist.
 
     Returns:
         List of tables associated with that forecast type for that period
     """
-    _validate_data_dir(year, month, data_dir)
-    table_regex = ".*/PUBLIC_DVD_([A-Z_0-9]*)_[0-9]*.zip"
-    names = _get_table_names(year, month, data_dir, table_regex)
-    return sorted(names)
+    if validate:
+        _validate_year_and_month(year, month)
+    # the month listing (to validate data_dir) and the data_dir listing are
+    # independent, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        validation = executor.submit(_validate_data_dir, year, month, data_dir)
+        names = executor.submit(_get_table_names, year, month, data_dir, _TABLE_RE)
+    # raises a more informative error than the data_dir listing if data_dir is invalid
+    validation.result()
+    return sorted(names.result())
 
 
 @cache
-def get_table_names_and_sizes(year: int, month: int, data_dir: str) -> Dict:
+def get_table_names_and_sizes(year: int, month: int, data_dir: str) -> Dict[str, int]:
     """Returns table names and sizes from MMSDM Historical Data Archive page
 
-    For a year and month in the MMSDM Historical Data Archive, returns a list of
-    tuples each consisting of:
-    - A table name (obtained via captured regex group)
-    - The size of the associated zip file
+    For a year and month in the MMSDM Historical Data Archive, returns a dictionary
+    mapping:
+    - A table name (obtained via captured regex group), to
+    - The size of the associated zip file (in bytes)
+
+    Tables are ordered by ascending size.
 
     Args:
         year: Year
         month: Month
         data_dir : Directory within monthly archives
     Returns:
-        Tuple of table names and file sizes
+        Table names mapped to file sizes
+    Errors:
+        ValueError: If the size of a zip file cannot be read from the directory
+            listing
     """
-    regex = ".*/PUBLIC_DVD_([A-Z_0-9]*)_[0-9]*.zip"
-    names_and_sizes = []
-    links = _get_all_links_from_soup(year, month, data_dir)
-    for link in links:
-        if mo := match(regex, link):
+    name_size_dict: Dict[str, int] = {}
+    # sizes are read from the directory listing, so no request is needed per table
+    links = _get_all_links(year, month, data_dir)
+    for link, size in links:
+        if mo := _TABLE_RE.search(link):
+            if size is None:
+                raise ValueError(f"Could not read size of {link} from NEMWeb listing")
             name = mo.group(1).lstrip("_")
-            table_url = _construct_table_url(year, month, data_dir, name)
-            size = _get_filesize(table_url)
-            names_and_sizes.append((name, size))
-    names_and_size = list(set(names_and_sizes))
-    name_size_dict = {}
-    for name, size in names_and_size:
-        name_size_dict[name] = size
-    return name_size_dict
+            name_size_dict[name] = size
+    return dict(sorted(name_size_dict.items(), key=lambda kv: kv[1]))
 
 
 def get_and_unzip_table_csv(
@@ -343,43 +698,72 @@ def get_and_unzip_table_csv(
     This function:
 
     1. Downloads zip file in chunks to limit memory use and enable progress bar
-    2. Validates that the zip contains a single file that has the same name as the zip
+    2. Unzips chunks as they are downloaded, so the zip file is never saved to disk
+    3. Validates that the zip contains a single file that has the same name as the zip
 
     Args:
         year: Year
         month: Month
         data_dir : Directory within monthly archives
         table: Table name
-        cache: Path to save zip.
+        cache: Path to save csv.
     Returns:
-        None. Extracts csv to `cache`
+        None. Extracts csv to `cache`. If the csv has already been extracted to
+        `cache` and the zip file is unchanged on NEMWeb, nothing is downloaded.
+        If the `MMS_CACHE` environment variable is set, the csv is extracted to
+        (or reused from) that directory and then copied to `cache`.
+    Errors:
+        ValueError: If the table is not available, or if its zip file is invalid,
+            corrupted or has unexpected contents
     """
     available_tables = get_available_tables(year, month, data_dir)
     if table not in available_tables:
         raise ValueError(f"Table not in available tables for {month}/{year}")
-    if not (cache_path := Path(cache)).exists():
-        cache_path.mkdir(parents=True)
+    (cache_path := Path(cache)).mkdir(parents=True, exist_ok=True)
     url = _construct_table_url(year, month, data_dir, table)
-    file_name = Path(url).name
-    file_path = cache / Path(file_name)
-    with _session.get(url, stream=True) as resp:
-        total_length = int(resp.headers.get("Content-Length", 0))
-        resp.raise_for_status()
-        with tqdm.wrapattr(resp.raw, "read", desc=file_name, total=total_length) as raw:
-            with open(file_path, "wb") as fout:
-                shutil.copyfileobj(raw, fout)
-    z = ZipFile(file_path)
-    if (
-        len(csvfn := z.namelist()) == 1
-        and (zfn := match(".*DATA/(.*).zip", url))
-        and (fn := match("(.*).[cC][sS][vV]", csvfn.pop()))
-        and (fn.group(1) == zfn.group(1))
+    if (store := os.environ.get(_CSV_STORE_ENV_VAR)) and (
+        (store_path := Path(store)).resolve() != cache_path.resolve()
     ):
+        store_path.mkdir(parents=True, exist_ok=True)
+        csvfn = _download_and_unzip_csv(url, store_path)
+        # copied via a temporary file so that `cache` never holds a partial csv
+        part_path = cache_path / f"{csvfn}.{os.getpid()}.part"
         try:
-            z.extractall(cache)
-            z.close()
-        except BadZipFile:
-            logger.error(f"{z.testzip()} invalid or corrupted")
-        Path(file_path).unlink()
+            shutil.copyfile(store_path / csvfn, part_path)
+            os.replace(part_path, cache_path / csvfn)
+        finally:
+            part_path.unlink(missing_ok=True)
     else:
-        raise ValueError(f"Unexpected contents in zipfile from {url}")
+        _download_and_unzip_csv(url, cache_path)
+
+
+def get_tables(
+    year: int, month: int, data_dir: str, tables: List[str], cache: Path
+) -> None:
+    """Unzipped csv files for multiple tables downloaded to `cache`
+
+    Tables are downloaded and unzipped concurrently (see `get_and_unzip_table_csv`).
+
+    Args:
+        year: Year
+        month: Month
+        data_dir : Directory within monthly archives
+        tables: Table names
+        cache: Path to save csvs.
+    Returns:
+        None. Extracts csvs to `cache`
+    """
+    available_tables = get_available_tables(year, month, data_dir)
+    if unavailable := [table for table in tables if table not in available_tables]:
+        raise ValueError(
+            f"Tables not in available tables for {month}/{year}: {unavailable}"
+        )
+    with ThreadPoolExecutor(max_workers=_MAX_CONCURRENT_DOWNLOADS) as executor:
+        futures = [
+            executor.submit(
+                get_and_unzip_table_csv, year, month, data_dir, table, cache
+            )
+            for table in dict.fromkeys(tables)
+        ]
+    for future in futures:
+        future.result()
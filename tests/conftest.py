@@ -1,53 +1,184 @@
+import io
+import itertools
+import os
 import random
-from itertools import filterfalse
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterator, List, Tuple, Union
 
 import pytest
+import requests
 
+from mms_monthly_cli import mms_monthly
 from mms_monthly_cli.mms_monthly import get_table_names_and_sizes, get_years_and_months
 
 SIZE_THRESHOLD = 2 * 10**7
+# seed for table draws, which can be overridden to reproduce or vary a run
+MMS_SEED = int(os.environ.get("MMS_SEED", "1337"))
+
+TableSizes = Tuple[Dict[str, int], FrozenSet[str]]
+
+
+class _BrokenStream(io.BytesIO):
+    # raises once `limit` bytes have been read, like a dropped connection
+    def __init__(self, content: bytes, limit: int) -> None:
+        super().__init__(content)
+        self.limit = limit
+
+    def read(self, size: Union[int, None] = -1) -> bytes:
+        if (remaining := self.limit - self.tell()) <= 0:
+            raise requests.exceptions.ChunkedEncodingError("Connection broken")
+        return super().read(
+            remaining if size is None or size < 0 else min(size, remaining)
+        )
+
+
+class FakeNEMWeb:
+    # stands in for the requests session, serving content registered for each URL
+    # (and 404 otherwise). Requests matching a registered ETag are served a 304
+    def __init__(self) -> None:
+        self.responses: Dict[
+            str, Tuple[int, bytes, Dict[str, str], Union[int, None]]
+        ] = {}
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+
+    def add(
+        self,
+        url: str,
+        content: bytes,
+        status: int = 200,
+        headers: Dict = {},
+        fail_after: Union[int, None] = None,
+    ) -> None:
+        self.responses[url] = (status, content, headers, fail_after)
+
+    def get(self, url: str, headers: Dict = {}, **kwargs) -> requests.Response:
+        self.requests.append((url, headers))
+        status, content, response_headers, fail_after = self.responses.get(
+            url, (404, b"", {}, None)
+        )
+        etag = response_headers.get("ETag")
+        if etag is not None and headers.get("If-None-Match") == etag:
+            status, content = 304, b""
+        response = requests.Response()
+        response.url = url
+        response.status_code = status
+        response.headers.update(
+            {"Content-Length": str(len(content)), **response_headers}
+        )
+        if fail_after is None:
+            response.raw = io.BytesIO(content)
+        else:
+            response.raw = _BrokenStream(content, fail_after)
+        return response
+
+
+def _get_table_sizes(year: int, month: int, data_dir: str) -> TableSizes:
+    # return enumerated tables (those with 1 and 2 in their names) with the sizes,
+    # so they are only identified once per listing
+    table_sizes = get_table_names_and_sizes(year, month, data_dir)
+    enumerated = frozenset(t for t in table_sizes if "1" in t and "2" in t)
+    return table_sizes, enumerated
+
+
+def pytest_report_header(config) -> str:
+    return f"MMS_SEED: {MMS_SEED}"
+
+
+@pytest.fixture
+def nemweb(monkeypatch, tmp_path) -> Iterator[FakeNEMWeb]:
+    fake = FakeNEMWeb()
+    monkeypatch.setattr(mms_monthly, "_session", fake)
+    # results and download metadata persisted to disk are also kept to the test
+    monkeypatch.setattr(mms_monthly, "_CACHE_DIR", tmp_path / "mms_monthly_cli")
+    # scraped pages are memoized, so do not share them with other tests
+    mms_monthly.clear_scrape_cache()
+    yield fake
+    mms_monthly.clear_scrape_cache()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def disk_cache_dir(pytestconfig: pytest.Config) -> Iterator[Path]:
+    # keep results and download metadata persisted by tests out of the user cache,
+    # but in pytest's cache so that later runs reuse them (e.g. available periods)
+    disk_cache_dir = pytestconfig.cache.mkdir("mms_monthly_cli")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(mms_monthly, "_CACHE_DIR", disk_cache_dir)
+        yield disk_cache_dir
+
+
+@pytest.fixture(scope="session", autouse=True)
+def persistent_csv_store(pytestconfig: pytest.Config) -> Iterator[Path]:
+    # extract csvs to a store in pytest's cache so that later runs reuse them,
+    # unless a store has been set through MMS_CACHE
+    if "MMS_CACHE" in os.environ:
+        yield Path(os.environ["MMS_CACHE"])
+        return
+    store = pytestconfig.cache.mkdir("mms_csv_store")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("MMS_CACHE", str(store))
+        yield store
+
+
+@pytest.fixture(scope="session")
+def rng() -> random.Random:
+    # offset per pytest-xdist worker, so each worker draws its own tables
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    return random.Random(MMS_SEED + int(worker[2:]))
 
 
 @pytest.fixture(scope="session")
-def random_year_month() -> Tuple[int, int]:
+def random_year_month(rng) -> Tuple[int, int]:
     years_months = get_years_and_months()
-    random_year = random.choice(list(years_months.keys()))
-    random_month = random.choice(years_months[random_year])
+    random_year = rng.choice(list(years_months))
+    random_month = rng.choice(years_months[random_year])
     return (random_year, random_month)
 
 
-@pytest.fixture
-def random_DATA_table(random_year_month) -> Tuple[int, int, str, int]:
-    year, month = random_year_month
-    table_sizes = get_table_names_and_sizes(year, month, "DATA")
-    small_tables = filterfalse(lambda x: table_sizes[x] > SIZE_THRESHOLD, table_sizes)
-    small_non_enumerated_tables = filterfalse(
-        lambda x: "1" in x and "2" in x, small_tables
-    )
-    table = random.choice(list(small_non_enumerated_tables))
-    return year, month, table, table_sizes[table]
+@pytest.fixture(scope="session")
+def shared_cache(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    if "PYTEST_XDIST_WORKER" not in os.environ:
+        return tmp_path_factory.mktemp("mms_cache")
+    # under pytest-xdist, share a cache between workers within the same run
+    cache = tmp_path_factory.getbasetemp().parent / "mms_cache"
+    cache.mkdir(exist_ok=True)
+    return cache
 
 
-@pytest.fixture
-def random_PREDISP_ALL_DATA_table(random_year_month) -> Tuple[int, int, str, int]:
-    year, month = random_year_month
-    table_sizes = get_table_names_and_sizes(year, month, "PREDISP_ALL_DATA")
-    small_tables = filterfalse(lambda x: table_sizes[x] > SIZE_THRESHOLD, table_sizes)
-    small_non_enumerated_tables = filterfalse(
-        lambda x: "1" in x and "2" in x, small_tables
-    )
-    table = random.choice(list(small_non_enumerated_tables))
-    return year, month, table, table_sizes[table]
+@pytest.fixture(scope="session")
+def data_dir_periods(rng, random_year_month) -> Dict[str, Tuple[int, int]]:
+    # P5MIN_ALL_DATA does not exist for every period, so draw from 2022
+    return {
+        "DATA": random_year_month,
+        "PREDISP_ALL_DATA": random_year_month,
+        "P5MIN_ALL_DATA": (2022, rng.choice(range(1, 13))),
+    }
+
+
+@pytest.fixture(scope="session")
+def table_sizes_cache(data_dir_periods) -> Dict[str, TableSizes]:
+    # fetch the listing for each data_dir concurrently
+    with ThreadPoolExecutor(max_workers=len(data_dir_periods)) as executor:
+        futures = {
+            data_dir: executor.submit(_get_table_sizes, year, month, data_dir)
+            for data_dir, (year, month) in data_dir_periods.items()
+        }
+    return {data_dir: future.result() for data_dir, future in futures.items()}
 
 
 @pytest.fixture
-def random_P5MIN_ALL_DATA_table() -> Tuple[int, int, str, int]:
-    month = random.choice(range(1, 13))
-    table_sizes = get_table_names_and_sizes(2022, month, "P5MIN_ALL_DATA")
-    small_tables = filterfalse(lambda x: table_sizes[x] > SIZE_THRESHOLD, table_sizes)
-    small_non_enumerated_tables = filterfalse(
-        lambda x: "1" in x and "2" in x, small_tables
+def random_table(
+    request, rng, data_dir_periods, table_sizes_cache
+) -> Tuple[int, int, str, str, int]:
+    data_dir = request.param
+    if data_dir not in data_dir_periods:
+        raise ValueError(f"Unsupported data_dir: {data_dir}")
+    year, month = data_dir_periods[data_dir]
+    table_sizes, enumerated = table_sizes_cache[data_dir]
+    # tables are ordered by size, so stop at the first one over the threshold
+    small_tables = itertools.takewhile(
+        lambda kv: kv[1] <= SIZE_THRESHOLD, table_sizes.items()
     )
-    table = random.choice(list(small_non_enumerated_tables))
-    return 2022, month, table, table_sizes[table]
+    small_non_enumerated_tables = [t for t, _ in small_tables if t not in enumerated]
+    table = rng.choice(small_non_enumerated_tables)
+    return year, month, data_dir, table, table_sizes[table]
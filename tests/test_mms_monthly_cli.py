@@ -1,47 +1,51 @@
 from pathlib import Path
 
 import pytest
+from filelock import FileLock
 
-from mms_monthly_cli.mms_monthly import _construct_filename, get_and_unzip_table_csv
+from mms_monthly_cli.mms_monthly import (
+    _construct_filename,
+    get_and_unzip_table_csv,
+    get_tables,
+)
 
-
-def test_get_random_data_table(random_DATA_table, tmp_path_factory):
-    cache = tmp_path_factory.mktemp("temp")
-    year, month, table, _ = random_DATA_table
-    get_and_unzip_table_csv(year, month, "DATA", table, cache)
-    filename = Path(_construct_filename(year, month, table)).stem
-    assert Path(cache, filename + ".CSV").exists()
+# every test here queries NEMWeb, including those that validate inputs
+pytestmark = pytest.mark.network
 
 
-def test_get_random_predisp_table(random_PREDISP_ALL_DATA_table, tmp_path_factory):
-    cache = tmp_path_factory.mktemp("temp")
-    year, month, table, _ = random_PREDISP_ALL_DATA_table
-    get_and_unzip_table_csv(year, month, "PREDISP_ALL_DATA", table, cache)
+@pytest.mark.parametrize(
+    "random_table", ["DATA", "PREDISP_ALL_DATA", "P5MIN_ALL_DATA"], indirect=True
+)
+def test_get_random_table(random_table, shared_cache):
+    year, month, data_dir, table, _ = random_table
     filename = Path(_construct_filename(year, month, table)).stem
-    assert Path(cache, filename + ".CSV").exists()
+    # pytest-xdist workers that draw the same table must not extract it concurrently
+    with FileLock(Path(shared_cache, filename + ".lock")):
+        get_and_unzip_table_csv(year, month, data_dir, table, shared_cache)
+    assert Path(shared_cache, filename + ".CSV").exists()
 
 
-def test_get_random_p5min_table(random_P5MIN_ALL_DATA_table, tmp_path_factory):
-    cache = tmp_path_factory.mktemp("temp")
-    year, month, table, _ = random_P5MIN_ALL_DATA_table
-    get_and_unzip_table_csv(year, month, "P5MIN_ALL_DATA", table, cache)
+@pytest.mark.parametrize(
+    "random_table", ["DATA", "PREDISP_ALL_DATA", "P5MIN_ALL_DATA"], indirect=True
+)
+def test_get_random_table_with_get_tables(random_table, shared_cache):
+    year, month, data_dir, table, _ = random_table
     filename = Path(_construct_filename(year, month, table)).stem
-    assert Path(cache, filename + ".CSV").exists()
+    with FileLock(Path(shared_cache, filename + ".lock")):
+        get_tables(year, month, data_dir, [table, table], shared_cache)
+    assert Path(shared_cache, filename + ".CSV").exists()
 
 
-def test_catch_invalid_year(tmp_path_factory):
-    cache = tmp_path_factory.mktemp("temp")
+def test_catch_invalid_year(shared_cache):
     with pytest.raises(ValueError):
-        get_and_unzip_table_csv(1999, 1, "DATA", "DISPATCHREGIONSUM", cache)
+        get_and_unzip_table_csv(1999, 1, "DATA", "DISPATCHREGIONSUM", shared_cache)
 
 
-def test_catch_invalid_datadir(tmp_path_factory):
-    cache = tmp_path_factory.mktemp("temp")
+def test_catch_invalid_datadir(shared_cache):
     with pytest.raises(ValueError):
-        get_and_unzip_table_csv(2022, 1, "FAKE_DATA", "DISPATCHREGIONSUM", cache)
+        get_and_unzip_table_csv(2022, 1, "FAKE_DATA", "DISPATCHREGIONSUM", shared_cache)
 
 
-def test_catch_invalid_table(tmp_path_factory):
-    cache = tmp_path_factory.mktemp("temp")
+def test_catch_invalid_table(shared_cache):
     with pytest.raises(ValueError):
-        get_and_unzip_table_csv(2022, 1, "DATA", "SILLY_TABLE", cache)
+        get_and_unzip_table_csv(2022, 1, "DATA", "SILLY_TABLE", shared_cache)
@@ -0,0 +1,310 @@
+import io
+import random
+import zipfile
+from pathlib import Path
+
+import pytest
+import requests
+from typer.testing import CliRunner
+
+from mms_monthly_cli import cli, mms_monthly
+from mms_monthly_cli.cli import app
+from mms_monthly_cli.mms_monthly import (
+    MMSDM_ARCHIVE_URL,
+    _construct_filename,
+    _construct_table_url,
+    _construct_yearmonth_url,
+    _disk_cache,
+    _download_and_unzip_csv,
+    _request_links,
+    clear_disk_cache,
+    get_and_unzip_table_csv,
+    get_table_names_and_sizes,
+    get_tables,
+)
+
+# directory listings saved in NEMWeb's format
+DATA_PATH = Path(__file__).parent / "data"
+DATA_URL = _construct_yearmonth_url(2022, 1, "DATA")
+TABLE_URL = _construct_table_url(2022, 1, "DATA", "DISPATCHREGIONSUM")
+CSV_NAME = _construct_filename(2022, 1, "DISPATCHREGIONSUM") + ".CSV"
+
+
+@pytest.fixture
+def data_listing(nemweb) -> bytes:
+    listing = (DATA_PATH / "DATA_listing.html").read_bytes()
+    nemweb.add(DATA_URL, listing)
+    return listing
+
+
+@pytest.fixture(autouse=True)
+def no_csv_store(monkeypatch) -> None:
+    # csvs are only extracted to a store in tests that request `csv_store`
+    monkeypatch.delenv("MMS_CACHE", raising=False)
+
+
+@pytest.fixture
+def csv_store(monkeypatch, tmp_path: Path) -> Path:
+    store = tmp_path / "mms_csv_store"
+    monkeypatch.setenv("MMS_CACHE", str(store))
+    return store
+
+
+def _dir_listing(*paths: str) -> bytes:
+    # directory listing in NEMWeb's format that only lists directories
+    entries = (
+        f'Friday, February 11, 2022  4:06 PM    &lt;dir&gt; <A HREF="{path}">'
+        + f"{path.rstrip('/').rsplit('/', 1)[-1]}</A><br>"
+        for path in paths
+    )
+    return ("<html><body><pre>" + "".join(entries) + "</pre></body></html>").encode()
+
+
+@pytest.fixture
+def table_csv() -> bytes:
+    # random values, so that the csv does not compress to a trivially small zip
+    rng = random.Random(0)
+    rows = (f"D,DISPATCH,REGIONSUM,{i},{rng.random()}\n" for i in range(50000))
+    return "".join(rows).encode()
+
+
+def _zip(csv_name: str, csv: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(csv_name, csv)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def table_zip(table_csv) -> bytes:
+    return _zip(CSV_NAME, table_csv)
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> Path:
+    (cache := tmp_path / "cache").mkdir()
+    return cache
+
+
+@pytest.fixture
+def table_listings(nemweb, data_listing) -> None:
+    month_path = "/Data_Archive/Wholesale_Electricity/MMSDM/2022/MMSDM_2022_01/"
+    nemweb.add(
+        _construct_yearmonth_url(2022, 1, None),
+        _dir_listing(
+            month_path + "MMSDM_Historical_Data_SQLLoader/DATA/",
+            month_path + "MMSDM_Historical_Data_SQLLoader/PREDISP_ALL_DATA/",
+        ),
+    )
+
+
+def test_scrape_links_and_sizes(data_listing):
+    links = _request_links(DATA_URL)
+    # the parent directory link is listed without a size
+    assert links[0] == (
+        "/Data_Archive/Wholesale_Electricity/MMSDM/2022/MMSDM_2022_01/"
+        + "MMSDM_Historical_Data_SQLLoader/",
+        None,
+    )
+    assert links[1] == (
+        "/Data_Archive/Wholesale_Electricity/MMSDM/2022/MMSDM_2022_01/"
+        + "MMSDM_Historical_Data_SQLLoader/DATA/"
+        + "PUBLIC_DVD_ANCILLARY_RECOVERY_SPLIT_202201010000.zip",
+        10734,
+    )
+    assert len(links) == 8
+
+
+def test_get_table_names_and_sizes(data_listing):
+    assert get_table_names_and_sizes(2022, 1, "DATA") == {
+        "BIDTYPES": 1498,
+        "ANCILLARY_RECOVERY_SPLIT": 10734,
+        "MNSP_INTERCONNECTOR": 21543,
+        "DISPATCHREGIONSUM": 3918022,
+        "DISPATCHLOAD_FILE01": 348573104,
+        "DISPATCHLOAD_FILE02": 349104411,
+        "BIDPEROFFER_D": 2076485512,
+    }
+    assert list(get_table_names_and_sizes(2022, 1, "DATA").values()) == sorted(
+        get_table_names_and_sizes(2022, 1, "DATA").values()
+    )
+
+
+def test_catch_unlisted_size(nemweb, data_listing):
+    # e.g. if the listing format changes such that sizes are no longer captured
+    nemweb.add(DATA_URL, data_listing.replace(b"  10734 <A", b"  10.5 KB <A"))
+    with pytest.raises(ValueError):
+        get_table_names_and_sizes(2022, 1, "DATA")
+
+
+def test_catch_missing_listing(nemweb):
+    with pytest.raises(ValueError):
+        get_table_names_and_sizes(2022, 1, "DATA")
+
+
+@pytest.mark.parametrize("remove_csv", [True, False])
+def test_interrupted_download_is_not_reused(
+    nemweb, cache, table_csv, table_zip, remove_csv
+):
+    nemweb.add(TABLE_URL, table_zip, headers={"ETag": '"1"'})
+    _download_and_unzip_csv(TABLE_URL, cache)
+    if remove_csv:
+        (cache / CSV_NAME).unlink()
+    # the download is then dropped partway through
+    nemweb.add(
+        TABLE_URL, table_zip, headers={"ETag": '"2"'}, fail_after=len(table_zip) // 2
+    )
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        _download_and_unzip_csv(TABLE_URL, cache)
+    # neither a partial csv nor the previous download's validators are left behind
+    if remove_csv:
+        assert list(cache.iterdir()) == []
+    else:
+        assert [p.name for p in cache.iterdir()] == [CSV_NAME]
+        assert (cache / CSV_NAME).read_bytes() == table_csv
+    nemweb.add(TABLE_URL, table_zip, headers={"ETag": '"2"'})
+    assert _download_and_unzip_csv(TABLE_URL, cache) == CSV_NAME
+    assert "If-None-Match" not in nemweb.requests[-1][1]
+    assert (cache / CSV_NAME).read_bytes() == table_csv
+
+
+@pytest.mark.parametrize("content", ["html", "truncated_zip"])
+def test_catch_invalid_zip(nemweb, table_listings, cache, table_zip, content):
+    if content == "html":
+        body = b"<html><body>Service temporarily unavailable</body></html>"
+    else:
+        body = table_zip[: len(table_zip) // 2]
+    nemweb.add(TABLE_URL, body, headers={"ETag": '"1"'})
+    with pytest.raises(ValueError):
+        get_and_unzip_table_csv(2022, 1, "DATA", "DISPATCHREGIONSUM", cache)
+    assert list(cache.iterdir()) == []
+    # validators are not saved, so the next download is not conditional
+    nemweb.add(TABLE_URL, table_zip, headers={"ETag": '"1"'})
+    get_and_unzip_table_csv(2022, 1, "DATA", "DISPATCHREGIONSUM", cache)
+    assert "If-None-Match" not in nemweb.requests[-1][1]
+    assert [p.name for p in cache.iterdir()] == [CSV_NAME]
+
+
+def test_unchanged_download_is_not_repeated(nemweb, cache, table_csv, table_zip):
+    validators = {"ETag": '"1"', "Last-Modified": "Fri, 11 Feb 2022 05:06:00 GMT"}
+    nemweb.add(TABLE_URL, table_zip, headers=validators)
+    assert _download_and_unzip_csv(TABLE_URL, cache) == CSV_NAME
+    assert _download_and_unzip_csv(TABLE_URL, cache) == CSV_NAME
+    _, headers = nemweb.requests[-1]
+    assert headers["If-None-Match"] == validators["ETag"]
+    assert headers["If-Modified-Since"] == validators["Last-Modified"]
+    assert (cache / CSV_NAME).read_bytes() == table_csv
+
+
+def test_disk_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(mms_monthly, "_CACHE_DIR", tmp_path)
+    calls = []
+
+    @_disk_cache(ttl=60, decode=lambda result: {int(k): v for k, v in result.items()})
+    def cached(key: int) -> dict:
+        calls.append(key)
+        return {key: len(calls)}
+
+    assert cached(1) == cached(1) == {1: 1}
+    assert cached(2) == {2: 2}
+    assert calls == [1, 2]
+    clear_disk_cache()
+    assert cached(1) == {1: 3}
+
+
+def test_disk_cache_expiry(monkeypatch, tmp_path):
+    monkeypatch.setattr(mms_monthly, "_CACHE_DIR", tmp_path)
+    calls = []
+
+    @_disk_cache(ttl=0)
+    def cached() -> int:
+        calls.append(None)
+        return len(calls)
+
+    assert (cached(), cached()) == (1, 2)
+
+
+def test_cli_refresh(nemweb):
+    year_path = "/Data_Archive/Wholesale_Electricity/MMSDM/2022/"
+    nemweb.add(MMSDM_ARCHIVE_URL, _dir_listing(year_path))
+    nemweb.add(MMSDM_ARCHIVE_URL + "2022/", _dir_listing(year_path + "MMSDM_2022_01/"))
+    assert "2022: [1]" in CliRunner().invoke(app, ["available-periods"]).output
+    # a month published since the catalog was cached is only found with --refresh
+    nemweb.add(
+        MMSDM_ARCHIVE_URL + "2022/",
+        _dir_listing(year_path + "MMSDM_2022_01/", year_path + "MMSDM_2022_02/"),
+    )
+    mms_monthly.clear_scrape_cache()
+    assert "2022: [1]" in CliRunner().invoke(app, ["available-periods"]).output
+    result = CliRunner().invoke(app, ["--refresh", "available-periods"])
+    assert "2022: [1, 2]" in result.output
+
+
+def test_get_and_unzip_table_csv(nemweb, table_listings, cache, table_csv, table_zip):
+    nemweb.add(TABLE_URL, table_zip, headers={"ETag": '"1"'})
+    get_and_unzip_table_csv(2022, 1, "DATA", "DISPATCHREGIONSUM", cache)
+    assert [p.name for p in cache.iterdir()] == [CSV_NAME]
+    assert (cache / CSV_NAME).read_bytes() == table_csv
+
+
+def test_get_and_unzip_table_csv_with_store(
+    nemweb, table_listings, csv_store, tmp_path, table_csv, table_zip
+):
+    nemweb.add(TABLE_URL, table_zip, headers={"ETag": '"1"'})
+    caches = [tmp_path / "cache_a", tmp_path / "cache_b"]
+    for cache in caches:
+        get_and_unzip_table_csv(2022, 1, "DATA", "DISPATCHREGIONSUM", cache)
+        assert [p.name for p in cache.iterdir()] == [CSV_NAME]
+        assert (cache / CSV_NAME).read_bytes() == table_csv
+    assert [p.name for p in csv_store.iterdir()] == [CSV_NAME]
+    # the csv in the store is reused for the second cache
+    table_requests = [h for url, h in nemweb.requests if url == TABLE_URL]
+    assert "If-None-Match" in table_requests[-1]
+
+
+def test_get_tables(nemweb, table_listings, cache, table_csv, table_zip):
+    tables = ["DISPATCHREGIONSUM", "BIDTYPES", "DISPATCHREGIONSUM"]
+    bidtypes_name = _construct_filename(2022, 1, "BIDTYPES") + ".CSV"
+    nemweb.add(TABLE_URL, table_zip)
+    nemweb.add(
+        _construct_table_url(2022, 1, "DATA", "BIDTYPES"),
+        _zip(bidtypes_name, b"I,BIDTYPES\n"),
+    )
+    get_tables(2022, 1, "DATA", tables, cache)
+    assert sorted(p.name for p in cache.iterdir()) == [bidtypes_name, CSV_NAME]
+    assert (cache / CSV_NAME).read_bytes() == table_csv
+    # duplicate tables are only downloaded once
+    assert [url for url, _ in nemweb.requests].count(TABLE_URL) == 1
+
+
+def test_get_tables_catches_invalid_table(nemweb, table_listings, cache):
+    with pytest.raises(ValueError):
+        get_tables(2022, 1, "DATA", ["DISPATCHREGIONSUM", "SILLY_TABLE"], cache)
+    assert TABLE_URL not in [url for url, _ in nemweb.requests]
+
+
+@pytest.mark.parametrize(
+    "tables, expected",
+    [
+        ("DISPATCHREGIONSUM", ["DISPATCHREGIONSUM"]),
+        ("DISPATCHREGIONSUM,BIDTYPES", ["DISPATCHREGIONSUM", "BIDTYPES"]),
+        (" DISPATCHREGIONSUM, ,BIDTYPES,", ["DISPATCHREGIONSUM", "BIDTYPES"]),
+        ("BIDTYPES,DISPATCHREGIONSUM,BIDTYPES", ["BIDTYPES", "DISPATCHREGIONSUM"]),
+    ],
+)
+def test_cli_get_tables(monkeypatch, tmp_path, tables, expected):
+    calls = []
+    monkeypatch.setattr(cli, "_validate_data_dir", lambda *args: None)
+    monkeypatch.setattr(cli, "get_tables", lambda *args: calls.append(args))
+    result = CliRunner().invoke(app, ["get-tables", "2022", "1", tables, str(tmp_path)])
+    assert result.exit_code == 0
+    assert calls == [(2022, 1, "DATA", expected, tmp_path)]
+
+
+@pytest.mark.parametrize("tables", ["", ",", " , "])
+def test_cli_get_tables_catches_no_tables(monkeypatch, tmp_path, tables):
+    calls = []
+    monkeypatch.setattr(cli, "get_tables", lambda *args: calls.append(args))
+    result = CliRunner().invoke(app, ["get-tables", "2022", "1", tables, str(tmp_path)])
+    assert result.exit_code == 2
+    assert calls == []